@@ -3,120 +3,89 @@ Email Alert Sender
 Sends email notifications for critical detections
 """
 
-import aiosmtplib
+from __future__ import annotations
+
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+import asyncio
+import functools
 import os
-from typing import Dict, Optional
-from datetime import datetime
-
-
-class EmailSender:
-    """Gmail SMTP email sender"""
-
-    def __init__(self):
-        self.smtp_host = os.getenv("SMTP_HOST", "smtp.gmail.com")
-        self.smtp_port = int(os.getenv("SMTP_PORT", "587"))
-        self.smtp_user = os.getenv("SMTP_USER")
-        self.smtp_password = os.getenv("SMTP_PASSWORD")
-        self.from_email = os.getenv("SMTP_FROM_EMAIL") or self.smtp_user
-
-        if not self.smtp_user or not self.smtp_password:
-            print("⚠️  WARNING: Email credentials not set. Email alerts disabled.")
-            self.enabled = False
-        else:
-            self.enabled = True
-            print(f"✅ Email alerts enabled ({self.smtp_user})")
-
-    async def send_detection_alert(
-        self,
-        to_email: str,
-        detection: Dict,
-        diagnosis: Optional[Dict] = None
-    ) -> bool:
-        """
-        Send detection alert email
-
-        Args:
-            to_email: Recipient email
-            detection: Detection dict
-            diagnosis: Optional Claude diagnosis
-
-        Returns:
-            True if sent successfully
-        """
-
-        if not self.enabled:
-            print("Email not configured, skipping alert")
-            return False
-
-        try:
-            # Build email content
-            severity = diagnosis['severity'] if diagnosis else 'unknown'
-            message_text = diagnosis['message'] if diagnosis else f"{detection['type']} detected"
-
-            severity_emoji = {
-                'critical': '🚨',
-                'high': '⚠️',
-                'medium': '⚡',
-                'low': 'ℹ️'
-            }.get(severity, '⚠️')
-
-            subject = f"{severity_emoji} SafeGuard AI Alert: {detection['type'].upper()}"
-
-            # HTML email body
-            html_body = f"""
+import time
+from string import Template
+from typing import Dict, List, Optional
+
+# Drop and re-establish the SMTP session after this much idle time (seconds).
+# Gmail closes idle connections server-side, so we proactively reconnect.
+SMTP_IDLE_TIMEOUT = 100.0
+
+
+# Severity metadata lookup: (emoji, accent color, recommended action).
+# Built once at module level so each send is a single dict probe.
+_SEVERITY_META = {
+    'critical': ('🚨', '#991b1b',
+                 'Immediate attention required. Verify the situation and take appropriate action.'),
+    'high': ('⚠️', '#ef4444',
+             'Immediate attention required. Verify the situation and take appropriate action.'),
+    'medium': ('⚡', '#f59e0b',
+               'Monitor the situation. This may be a routine detection.'),
+    'low': ('ℹ️', '#3b82f6',
+            'Monitor the situation. This may be a routine detection.'),
+}
+
+# Email bodies are compiled once at import time. Only the handful of dynamic
+# fields get substituted per send - the ~1.5KB CSS/HTML block is static.
+_HTML_TEMPLATE = Template("""
 <!DOCTYPE html>
 <html>
 <head>
     <style>
-        body {{ font-family: Arial, sans-serif; line-height: 1.6; }}
-        .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-        .header {{ background: #ef4444; color: white; padding: 20px; text-align: center; border-radius: 8px 8px 0 0; }}
-        .content {{ background: #f9fafb; padding: 20px; border: 1px solid #e5e7eb; }}
-        .footer {{ background: #374151; color: white; padding: 15px; text-align: center; border-radius: 0 0 8px 8px; font-size: 12px; }}
-        .alert-box {{ background: #fee2e2; border-left: 4px solid #ef4444; padding: 15px; margin: 15px 0; }}
-        .info-row {{ margin: 10px 0; }}
-        .label {{ font-weight: bold; color: #374151; }}
+        body { font-family: Arial, sans-serif; line-height: 1.6; }
+        .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+        .header { background: #ef4444; color: white; padding: 20px; text-align: center; border-radius: 8px 8px 0 0; }
+        .content { background: #f9fafb; padding: 20px; border: 1px solid #e5e7eb; }
+        .footer { background: #374151; color: white; padding: 15px; text-align: center; border-radius: 0 0 8px 8px; font-size: 12px; }
+        .alert-box { background: #fee2e2; border-left: 4px solid #ef4444; padding: 15px; margin: 15px 0; }
+        .info-row { margin: 10px 0; }
+        .label { font-weight: bold; color: #374151; }
     </style>
 </head>
 <body>
     <div class="container">
         <div class="header">
-            <h1>{severity_emoji} SafeGuard AI Security Alert</h1>
+            <h1>$severity_emoji SafeGuard AI Security Alert</h1>
         </div>
 
         <div class="content">
             <div class="alert-box">
-                <h2 style="margin-top: 0;">⚠️ {detection['type'].upper()} DETECTED</h2>
-                <p style="font-size: 16px; margin: 10px 0;">{message_text}</p>
+                <h2 style="margin-top: 0;">⚠️ $type_upper DETECTED</h2>
+                <p style="font-size: 16px; margin: 10px 0;">$message_text</p>
             </div>
 
             <div class="info-row">
                 <span class="label">Severity:</span>
-                <span style="color: #ef4444; font-weight: bold; text-transform: uppercase;">{severity}</span>
+                <span style="color: $severity_color; font-weight: bold; text-transform: uppercase;">$severity</span>
             </div>
 
             <div class="info-row">
                 <span class="label">Confidence:</span>
-                <span>{detection['confidence']*100:.1f}%</span>
+                <span>$confidence_pct%</span>
             </div>
 
             <div class="info-row">
                 <span class="label">Time:</span>
-                <span>{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</span>
+                <span>$time</span>
             </div>
 
             <div class="info-row">
                 <span class="label">Object Type:</span>
-                <span>{detection['type']}</span>
+                <span>$obj_type</span>
             </div>
 
-            {f'<div class="info-row"><span class="label">AI Analysis:</span><br/><span>{diagnosis.get("reasoning", "N/A")}</span></div>' if diagnosis else ''}
+            $diagnosis_block
 
             <p style="margin-top: 20px; padding: 15px; background: #dbeafe; border-radius: 6px;">
                 <strong>Recommended Action:</strong><br/>
-                {'Immediate attention required. Verify the situation and take appropriate action.' if diagnosis and diagnosis.get('should_alert') else 'Monitor the situation. This may be a routine detection.'}
+                $recommended_action
             </p>
         </div>
 
@@ -127,47 +96,208 @@ class EmailSender:
     </div>
 </body>
 </html>
-"""
+""")
 
-            # Plain text version
-            text_body = f"""
+_DIAGNOSIS_BLOCK_TEMPLATE = Template(
+    '<div class="info-row"><span class="label">AI Analysis:</span><br/><span>$reasoning</span></div>'
+)
+
+_TEXT_TEMPLATE = Template("""
 SafeGuard AI Security Alert
 
-{severity_emoji} {detection['type'].upper()} DETECTED
+$severity_emoji $type_upper DETECTED
 
-{message_text}
+$message_text
 
 Details:
-- Severity: {severity.upper()}
-- Confidence: {detection['confidence']*100:.1f}%
-- Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-- Object Type: {detection['type']}
+- Severity: $severity_upper
+- Confidence: $confidence_pct%
+- Time: $time
+- Object Type: $obj_type
 
 This is an automated alert from SafeGuard AI.
-"""
+""")
+
+
+class EmailSender:
+    """Gmail SMTP email sender"""
 
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = self.from_email
-            msg['To'] = to_email
-
-            # Attach parts
-            part1 = MIMEText(text_body, 'plain')
-            part2 = MIMEText(html_body, 'html')
-            msg.attach(part1)
-            msg.attach(part2)
-
-            # Send email
-            await aiosmtplib.send(
-                msg,
+    def __init__(self):
+        self.smtp_host = os.getenv("SMTP_HOST", "smtp.gmail.com")
+        self.smtp_port = int(os.getenv("SMTP_PORT", "587"))
+        self.smtp_user = os.getenv("SMTP_USER")
+        self.smtp_password = os.getenv("SMTP_PASSWORD")
+        self.from_email = os.getenv("SMTP_FROM_EMAIL") or self.smtp_user
+
+        if not self.smtp_user or not self.smtp_password:
+            print("⚠️  WARNING: Email credentials not set. Email alerts disabled.")
+            self.enabled = False
+        else:
+            self.enabled = True
+            print(f"✅ Email alerts enabled ({self.smtp_user})")
+
+        # Persistent SMTP connection (avoids TCP+TLS+AUTH handshake per alert)
+        self._client: Optional[aiosmtplib.SMTP] = None
+        self._lock = asyncio.Lock()
+        self._last_used = 0.0
+
+    async def _get_client(self) -> aiosmtplib.SMTP:
+        """
+        Return the cached SMTP client, reconnecting if idle too long.
+
+        Must be called while holding self._lock.
+        """
+        import aiosmtplib
+
+        now = time.monotonic()
+
+        if self._client is not None and now - self._last_used > SMTP_IDLE_TIMEOUT:
+            # Server likely dropped the idle connection - close and reconnect
+            try:
+                await self._client.quit()
+            except Exception:
+                pass
+            self._client = None
+
+        if self._client is None:
+            client = aiosmtplib.SMTP(
                 hostname=self.smtp_host,
                 port=self.smtp_port,
-                username=self.smtp_user,
-                password=self.smtp_password,
                 start_tls=True,
                 timeout=10
             )
+            await client.connect()
+            await client.login(self.smtp_user, self.smtp_password)
+            self._client = client
+
+        return self._client
+
+    async def close(self):
+        """Close the pooled SMTP connection (call on app shutdown)"""
+        async with self._lock:
+            if self._client is not None:
+                try:
+                    await self._client.quit()
+                except Exception:
+                    pass
+                self._client = None
+
+    def _build_message(
+        self,
+        to_email: str,
+        detection: Dict,
+        diagnosis: Optional[Dict] = None
+    ) -> MIMEMultipart:
+        """Build the alert MIME message for one recipient"""
+
+        # Build email content
+        severity = diagnosis['severity'] if diagnosis else 'unknown'
+        message_text = diagnosis['message'] if diagnosis else f"{detection['type']} detected"
+
+        severity_emoji, severity_color, recommended_action = _SEVERITY_META.get(
+            severity, _SEVERITY_META['medium']
+        )
+
+        subject = f"{severity_emoji} SafeGuard AI Alert: {detection['type'].upper()}"
+
+        # Substitute only the dynamic fields into the precompiled templates
+        type_upper = detection['type'].upper()
+        confidence_pct = f"{detection['confidence']*100:.1f}"
+        # One formatted timestamp shared by subject, HTML and text bodies;
+        # time.strftime skips constructing a datetime object entirely
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
+
+        diagnosis_block = ""
+        if diagnosis:
+            diagnosis_block = _DIAGNOSIS_BLOCK_TEMPLATE.substitute(
+                reasoning=diagnosis.get("reasoning", "N/A")
+            )
+
+        html_body = _HTML_TEMPLATE.substitute(
+            severity_emoji=severity_emoji,
+            type_upper=type_upper,
+            message_text=message_text,
+            severity=severity,
+            severity_color=severity_color,
+            confidence_pct=confidence_pct,
+            time=timestamp,
+            obj_type=detection['type'],
+            diagnosis_block=diagnosis_block,
+            recommended_action=recommended_action
+        )
+
+        text_body = _TEXT_TEMPLATE.substitute(
+            severity_emoji=severity_emoji,
+            type_upper=type_upper,
+            message_text=message_text,
+            severity_upper=severity.upper(),
+            confidence_pct=confidence_pct,
+            time=timestamp,
+            obj_type=detection['type']
+        )
+
+        # Create message
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = self.from_email
+        msg['To'] = to_email
+
+        # Attach parts
+        part1 = MIMEText(text_body, 'plain')
+        part2 = MIMEText(html_body, 'html')
+        msg.attach(part1)
+        msg.attach(part2)
+
+        return msg
+
+    async def _send_message(self, msg: MIMEMultipart, to_email: Optional[str] = None) -> None:
+        """
+        Send a prepared message over the pooled connection
+
+        When to_email is given, the To header is swapped in under the
+        connection lock so one MIME tree can be reused for a broadcast.
+        """
+        import aiosmtplib
+
+        async with self._lock:
+            if to_email is not None:
+                del msg['To']
+                msg['To'] = to_email
+            client = await self._get_client()
+            try:
+                await client.send_message(msg)
+            except (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError):
+                # Stale connection - reconnect once and retry
+                self._client = None
+                client = await self._get_client()
+                await client.send_message(msg)
+            self._last_used = time.monotonic()
+
+    async def send_detection_alert(
+        self,
+        to_email: str,
+        detection: Dict,
+        diagnosis: Optional[Dict] = None
+    ) -> bool:
+        """
+        Send detection alert email
+
+        Args:
+            to_email: Recipient email
+            detection: Detection dict
+            diagnosis: Optional Claude diagnosis
+
+        Returns:
+            True if sent successfully
+        """
+
+        if not self.enabled:
+            print("Email not configured, skipping alert")
+            return False
+
+        try:
+            msg = self._build_message(to_email, detection, diagnosis)
+            await self._send_message(msg)
 
             print(f"✅ Email alert sent to {to_email}")
             return True
@@ -176,14 +306,44 @@ This is an automated alert from SafeGuard AI.
             print(f"❌ Failed to send email: {e}")
             return False
 
+    async def send_many(
+        self,
+        recipients: List[str],
+        detection: Dict,
+        diagnosis: Optional[Dict] = None
+    ) -> List[bool]:
+        """
+        Fan out one alert to multiple recipients
+
+        The message body is rendered once - only the To header differs
+        per recipient. Sends run sequentially: there is a single pooled
+        SMTP connection, one transaction at a time, and the header swap
+        in _send_message relies on that serialization. The saving here
+        is the shared MIME render, not parallel delivery.
+
+        Returns:
+            List of per-recipient success flags (same order as recipients)
+        """
+
+        if not self.enabled or not recipients:
+            return [False] * len(recipients)
+
+        # Build the MIME tree once; only the To header changes per recipient
+        base_msg = self._build_message(recipients[0], detection, diagnosis)
 
-# Global instance
-_email_sender = None
+        results = []
+        for to_email in recipients:
+            try:
+                await self._send_message(base_msg, to_email=to_email)
+                print(f"✅ Email alert sent to {to_email}")
+                results.append(True)
+            except Exception as e:
+                print(f"❌ Failed to send email to {to_email}: {e}")
+                results.append(False)
+        return results
 
 
+@functools.lru_cache(maxsize=1)
 def get_email_sender() -> EmailSender:
     """Get or create global email sender"""
-    global _email_sender
-    if _email_sender is None:
-        _email_sender = EmailSender()
-    return _email_sender
+    return EmailSender()
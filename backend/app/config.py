@@ -4,13 +4,15 @@ Configuration Management for SafeGuard AI Backend
 Handles all environment variables and configuration settings
 """
 
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional
 
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables"""
 
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True)
+
     # Application
     APP_NAME: str = "SafeGuard AI Backend"
     APP_VERSION: str = "1.0.0"
@@ -49,10 +51,6 @@ class Settings(BaseSettings):
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
 
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
-
 
 # Global settings instance
 settings = Settings()
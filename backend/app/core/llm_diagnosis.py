@@ -3,18 +3,76 @@ Claude LLM Diagnosis
 Intelligent analysis of detections for threat assessment
 """
 
-from anthropic import Anthropic
+from __future__ import annotations
+
+import asyncio
+import functools
 import os
 import json
 import base64
-import cv2
-import numpy as np
-from typing import Dict, Optional
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# cv2 and anthropic together pull tens of MB and several hundred ms of
+# import time - defer them so worker cold-start stays fast
+
+# orjson parses small JSON several times faster than stdlib json; fall
+# back to stdlib when it is not installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Claude may wrap its JSON verdict in a markdown code fence
+_JSON_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+# Dangerous object classes: exact matches hit the frozenset in O(1);
+# the compiled regex covers compound labels like "kitchen knife"
+_DANGEROUS = frozenset({'knife', 'scissors', 'gun', 'rifle', 'weapon', 'pistol', 'firearm'})
+_DANGEROUS_RE = re.compile(r'\b(knife|scissors|gun|rifle|weapon|pistol|firearm)\b')
+
+# Claude downsizes large images anyway - shrinking before encode cuts both
+# the CPU cost of the JPEG encode and the base64 payload size (~4x smaller)
+MAX_IMAGE_DIM = 1024
+
+
+def _encode_frame_jpeg(frame: np.ndarray) -> str:
+    """Resize and JPEG-encode a frame for Claude, returning base64 text"""
+    import cv2
+
+    h, w = frame.shape[:2]
+    longest = max(h, w)
+    if longest > MAX_IMAGE_DIM:
+        scale = MAX_IMAGE_DIM / longest
+        frame = cv2.resize(
+            frame,
+            (int(w * scale), int(h * scale)),
+            interpolation=cv2.INTER_AREA
+        )
+
+    _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
+    # Feed the encoder a memoryview when possible - skips the extra
+    # tobytes() copy of the JPEG buffer
+    if buffer.flags['C_CONTIGUOUS']:
+        return base64.b64encode(memoryview(buffer)).decode('ascii')
+    return base64.b64encode(buffer.tobytes()).decode('ascii')
 
 
 class ClaudeDiagnoser:
     """Claude-powered intelligent detection diagnosis"""
 
+    # Cache settings: streams of near-identical detections (same class,
+    # similar confidence, visually similar frame) reuse the last verdict
+    CACHE_MAXSIZE = 256
+    CACHE_TTL = 30.0  # seconds
+
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
 
@@ -22,9 +80,50 @@ class ClaudeDiagnoser:
             print("⚠️  WARNING: ANTHROPIC_API_KEY not set. LLM diagnosis disabled.")
             self.client = None
         else:
-            self.client = Anthropic(api_key=self.api_key)
+            from anthropic import AsyncAnthropic
+            self.client = AsyncAnthropic(api_key=self.api_key)
             print("✅ Claude LLM initialized for diagnosis")
 
+        # LRU cache of recent diagnoses: key -> (timestamp, diagnosis dict)
+        self._cache: OrderedDict[Tuple, Tuple[float, Dict]] = OrderedDict()
+
+        # Last encoded frame: (frame hash, base64 string). Consecutive
+        # detections on the same frame skip the re-encode entirely.
+        self._last_encoded: Optional[Tuple[bytes, str]] = None
+
+    def _cache_key(self, detection: Dict, frame: Optional[np.ndarray]) -> Tuple:
+        """Build cache key from detection class, confidence bucket and frame hash"""
+        frame_hash = b""
+        if frame is not None:
+            import cv2
+
+            # Hash a 32x32 thumbnail - cheap and stable across near-identical frames
+            thumb = cv2.resize(frame, (32, 32), interpolation=cv2.INTER_AREA)
+            frame_hash = hashlib.blake2b(thumb.tobytes(), digest_size=8).digest()
+
+        return (detection['type'], round(detection['confidence'], 1), frame_hash)
+
+    def _cache_get(self, key: Tuple) -> Optional[Dict]:
+        """Look up a cached diagnosis, honoring the TTL"""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+
+        timestamp, diagnosis = entry
+        if time.monotonic() - timestamp > self.CACHE_TTL:
+            del self._cache[key]
+            return None
+
+        self._cache.move_to_end(key)
+        return diagnosis
+
+    def _cache_put(self, key: Tuple, diagnosis: Dict):
+        """Insert a diagnosis, evicting the oldest entry when full"""
+        self._cache[key] = (time.monotonic(), diagnosis)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.CACHE_MAXSIZE:
+            self._cache.popitem(last=False)
+
     async def diagnose(
         self,
         detection: Dict,
@@ -51,6 +150,21 @@ class ClaudeDiagnoser:
             # Fallback to rule-based if no API key
             return self._fallback_diagnosis(detection)
 
+        # Rule pre-filter: clear-cut cases (known-dangerous class at high
+        # confidence, or obviously routine objects) don't need a 1-3s model
+        # call - only ambiguous detections go to Claude
+        quick = self._fallback_diagnosis(detection)
+        confidence = detection['confidence']
+        if quick['severity'] in ('critical', 'low') and (confidence > 0.9 or confidence < 0.4):
+            return quick
+
+        # Reuse a recent verdict for near-identical detections (skips the
+        # JPEG encode, base64 and the ~1-3s API round-trip entirely)
+        cache_key = self._cache_key(detection, frame)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
         try:
             # Prepare prompt
             detection_info = f"""Detection Information:
@@ -65,9 +179,15 @@ Timestamp: {detection.get('timestamp', 'N/A')}
             # Add image if available
             if frame is not None:
                 try:
-                    # Encode frame as JPEG
-                    _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-                    image_b64 = base64.b64encode(buffer).decode('utf-8')
+                    frame_hash = cache_key[2]
+                    if self._last_encoded is not None and self._last_encoded[0] == frame_hash:
+                        # Same frame as the previous diagnosis - reuse its base64
+                        image_b64 = self._last_encoded[1]
+                    else:
+                        # Resize + encode in a worker thread - tens of ms of
+                        # pure CPU for large frames, so keep it off the event loop
+                        image_b64 = await asyncio.to_thread(_encode_frame_jpeg, frame)
+                        self._last_encoded = (frame_hash, image_b64)
 
                     content.append({
                         "type": "image",
@@ -105,7 +225,7 @@ Respond in JSON format:
             })
 
             # Call Claude
-            response = self.client.messages.create(
+            response = await self.client.messages.create(
                 model="claude-3-5-sonnet-20241022",
                 max_tokens=500,
                 temperature=0.3,  # Lower temperature for consistent assessment
@@ -119,32 +239,46 @@ Respond in JSON format:
             response_text = response.content[0].text
 
             # Extract JSON (may be wrapped in markdown)
-            if "```json" in response_text:
-                json_start = response_text.find("```json") + 7
-                json_end = response_text.find("```", json_start)
-                response_text = response_text[json_start:json_end].strip()
-            elif "```" in response_text:
-                json_start = response_text.find("```") + 3
-                json_end = response_text.find("```", json_start)
-                response_text = response_text[json_start:json_end].strip()
+            fence_match = _JSON_FENCE_RE.search(response_text)
+            if fence_match:
+                response_text = fence_match.group(1).strip()
 
-            diagnosis = json.loads(response_text)
+            diagnosis = _json_loads(response_text)
 
             print(f"🤖 Claude diagnosis: {diagnosis['severity']} - {diagnosis['message']}")
 
+            self._cache_put(cache_key, diagnosis)
+
             return diagnosis
 
         except Exception as e:
             print(f"❌ Claude diagnosis error: {e}")
             return self._fallback_diagnosis(detection)
 
+    async def diagnose_many(
+        self,
+        detections: List[Dict],
+        frame: Optional[np.ndarray] = None
+    ) -> List[Dict]:
+        """
+        Diagnose several detections from one frame concurrently
+
+        Awaiting diagnose() per detection serializes the API round-trips;
+        gathering them caps wall-clock latency at the slowest single call.
+        The shared frame is encoded once thanks to the encode cache.
+        """
+        if not detections:
+            return []
+        return list(await asyncio.gather(
+            *[self.diagnose(detection, frame) for detection in detections]
+        ))
+
     def _fallback_diagnosis(self, detection: Dict) -> Dict:
         """Rule-based fallback when Claude is unavailable"""
 
-        dangerous_objects = ['knife', 'scissors', 'gun', 'rifle', 'weapon']
         obj_type = detection['type'].lower()
 
-        is_dangerous = any(danger in obj_type for danger in dangerous_objects)
+        is_dangerous = obj_type in _DANGEROUS or bool(_DANGEROUS_RE.search(obj_type))
         confidence = detection['confidence']
 
         if is_dangerous:
@@ -169,13 +303,7 @@ Respond in JSON format:
         }
 
 
-# Global instance
-_diagnoser = None
-
-
+@functools.lru_cache(maxsize=1)
 def get_diagnoser() -> ClaudeDiagnoser:
     """Get or create global diagnoser instance"""
-    global _diagnoser
-    if _diagnoser is None:
-        _diagnoser = ClaudeDiagnoser()
-    return _diagnoser
+    return ClaudeDiagnoser()
@@ -5,10 +5,17 @@ For MVP, we'll use simple HTTP calls to Next.js API routes
 """
 
 import aiohttp
+import asyncio
+import functools
 from typing import Optional, Dict, List
 import os
 from datetime import datetime
 
+# Batching: flush queued detections every FLUSH_INTERVAL seconds, or
+# immediately once FLUSH_BATCH_SIZE are pending
+FLUSH_INTERVAL = 0.1
+FLUSH_BATCH_SIZE = 32
+
 
 class DatabaseClient:
     """Simple database client that calls Next.js API routes"""
@@ -16,6 +23,62 @@ class DatabaseClient:
     def __init__(self, frontend_url: str = None):
         self.frontend_url = frontend_url or os.getenv("FRONTEND_URL", "http://localhost:3000")
 
+        # One session for all calls - reuses established keep-alive
+        # connections instead of paying DNS + TCP (+ TLS) per request.
+        # Created lazily so construction works outside an event loop.
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        # Coalescing queue for detection inserts - a busy camera can emit
+        # dozens per second, so batch them into one createMany round-trip
+        self._pending: List[Dict] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get or create the shared HTTP session"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=100,
+                    limit_per_host=32,
+                    keepalive_timeout=60
+                ),
+                timeout=aiohttp.ClientTimeout(total=5)
+            )
+        return self._session
+
+    async def close(self):
+        """Flush pending writes and close the shared session (call on app shutdown)"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def flush(self):
+        """Send all queued detections as a single createMany call"""
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+
+        try:
+            session = await self._get_session()
+            async with session.post(
+                f"{self.frontend_url}/api/detections/createMany",
+                json={"detections": batch}
+            ) as response:
+                if response.status != 200:
+                    print(f"Failed to save detection batch: {response.status}")
+        except Exception as e:
+            print(f"Error saving detection batch: {e}")
+
+    async def _flusher(self):
+        """Background loop that flushes queued detections periodically"""
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            await self.flush()
+
     async def save_detection(
         self,
         user_id: str,
@@ -25,8 +88,14 @@ class DatabaseClient:
         severity: str = "low",
         llm_diagnosis: Optional[str] = None,
         camera_id: Optional[str] = None
-    ) -> Dict:
-        """Save detection event to database"""
+    ) -> None:
+        """
+        Queue a detection event for the database
+
+        Appends to an in-process batch and returns immediately; a
+        background task flushes batches every 100ms (or every 32 items)
+        as one createMany call instead of a round-trip per detection.
+        """
 
         data = {
             "userId": user_id,
@@ -38,45 +107,48 @@ class DatabaseClient:
             "cameraId": camera_id
         }
 
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.frontend_url}/api/detections/create",
-                    json=data,
-                    timeout=aiohttp.ClientTimeout(total=5)
-                ) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        print(f"Failed to save detection: {response.status}")
-                        return None
-        except Exception as e:
-            print(f"Error saving detection: {e}")
-            return None
+        self._pending.append(data)
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flusher())
+
+        if len(self._pending) >= FLUSH_BATCH_SIZE:
+            await self.flush()
+
+    async def save_detections_bulk(self, rows: List[Dict]) -> None:
+        """
+        Queue several detection rows at once
+
+        One list-extend instead of a call per row; rides the same
+        createMany flush as save_detection.
+        """
+        if not rows:
+            return
+
+        self._pending.extend(rows)
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flusher())
+
+        if len(self._pending) >= FLUSH_BATCH_SIZE:
+            await self.flush()
 
     async def get_user(self, user_id: str) -> Optional[Dict]:
         """Get user by ID"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.frontend_url}/api/users/{user_id}",
-                    timeout=aiohttp.ClientTimeout(total=5)
-                ) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    return None
+            session = await self._get_session()
+            async with session.get(
+                f"{self.frontend_url}/api/users/{user_id}"
+            ) as response:
+                if response.status == 200:
+                    return await response.json()
+                return None
         except Exception as e:
             print(f"Error getting user: {e}")
             return None
 
 
-# Global instance
-_db_client = None
-
-
+@functools.lru_cache(maxsize=1)
 def get_db_client() -> DatabaseClient:
     """Get or create database client"""
-    global _db_client
-    if _db_client is None:
-        _db_client = DatabaseClient()
-    return _db_client
+    return DatabaseClient()
@@ -17,22 +17,41 @@ Features:
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel
+from cachetools import TTLCache
+import orjson
 import cv2
 import numpy as np
 import base64
+
+# SIMD base64 (AVX2/AVX-512) is 3-4x faster on the ~80KB-per-frame
+# legacy text path; stdlib is the drop-in fallback
+try:
+    import pybase64 as _b64
+except ImportError:
+    _b64 = base64
 import asyncio
 import json
+import logging
+import re
 from typing import Dict, List
 from datetime import datetime
 import os
+import struct
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import time
 
 # Load environment variables
 load_dotenv()
 
+# Hot-path messages go through a level-gated logger, not print():
+# print holds the GIL and can flush per call, which serializes
+# coroutines at high FPS. %-style args keep formatting lazy - debug
+# strings are never built when the level is INFO.
+logger = logging.getLogger(__name__)
+
 # Import our enhanced modules
 from app.models.enhanced_detector import get_enhanced_detector
 from app.services.alert_system import get_alert_system
@@ -42,7 +61,8 @@ from app.services.ai_analyst import get_ai_analyst
 app = FastAPI(
     title="SafeGuard AI - Humanitarian Threat Detection",
     description="Real-time threat detection for public safety",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS
@@ -62,31 +82,236 @@ class ConnectionManager:
     async def connect(self, user_id: str, websocket: WebSocket):
         await websocket.accept()
         self.active_connections[user_id] = websocket
-        print(f"✅ User {user_id} connected. Total: {len(self.active_connections)}")
+        logger.info("User %s connected. Total: %d", user_id, len(self.active_connections))
 
     def disconnect(self, user_id: str):
         if user_id in self.active_connections:
             del self.active_connections[user_id]
-            print(f"❌ User {user_id} disconnected. Total: {len(self.active_connections)}")
+            logger.info("User %s disconnected. Total: %d", user_id, len(self.active_connections))
 
     async def send_message(self, user_id: str, message: dict):
         if user_id in self.active_connections:
             try:
-                await self.active_connections[user_id].send_json(message)
-            except Exception as e:
-                print(f"Error sending to {user_id}: {e}")
+                # orjson emits UTF-8 bytes directly - cheaper than
+                # send_json's stdlib dumps + encode. OPT_SERIALIZE_NUMPY
+                # writes ndarray bboxes / np.float32 confidences in place,
+                # so detection dicts need no tolist()/float() pre-pass.
+                await self.active_connections[user_id].send_bytes(
+                    orjson.dumps(message, option=orjson.OPT_SERIALIZE_NUMPY)
+                )
+            except Exception:
+                logger.warning("Error sending to %s", user_id, exc_info=True)
 
 manager = ConnectionManager()
 
-# Thread pool for CPU-intensive tasks
-executor = ThreadPoolExecutor(max_workers=4)
+# Thread pool for GIL-releasing OpenCV work (decode/encode) - sized to
+# the machine so multiple users' codec work proceeds in parallel
+executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+
+# Encoder params built once - not a new list per frame
+_JPEG_ENCODE_PARAMS = [cv2.IMWRITE_JPEG_QUALITY, 70]
+
+# Audio alert payloads are static per threat type - build them once
+# instead of allocating fresh dicts every frame
+_CRITICAL_ITEM_AUDIO_ALERT = {
+    'enabled': True, 'severity': 'critical', 'pattern': 'triple',
+    'frequency': 2500, 'duration': 200
+}
+
+# One DFA pass instead of five substring scans per alerting activity;
+# group names index straight into the payload table below
+_ACTIVITY_RE = re.compile(
+    r'(?P<unconscious>unconscious)|(?P<drowning>drowning)|(?P<falling>falling)'
+    r'|(?P<sleeping>sleeping)|(?P<eyes_closed>eyes|closed)',
+    re.IGNORECASE
+)
+
+# Severity rank per group, mirroring the original elif-chain order. A
+# compound label ("falling_unconscious") can match several groups, and
+# re.search would return whichever occurs earliest in the STRING - so
+# the caller collects every match and the lowest rank here wins.
+_ACTIVITY_PRIORITY = {
+    name: rank for rank, name in enumerate(
+        ('unconscious', 'drowning', 'falling', 'sleeping', 'eyes_closed'))
+}
+
+_ACTIVITY_AUDIO_ALERTS = {
+    'unconscious': {'enabled': True, 'severity': 'critical', 'pattern': 'triple', 'frequency': 2500, 'duration': 200, 'threat_type': 'unconscious'},
+    'drowning': {'enabled': True, 'severity': 'critical', 'pattern': 'triple', 'frequency': 2500, 'duration': 200, 'threat_type': 'drowning'},
+    'falling': {'enabled': True, 'severity': 'high', 'pattern': 'single', 'frequency': 2000, 'duration': 800, 'threat_type': 'falling'},
+    'sleeping': {'enabled': True, 'severity': 'medium', 'pattern': 'single', 'frequency': 1500, 'duration': 500, 'threat_type': 'sleeping'},
+    'eyes_closed': {'enabled': True, 'severity': 'high', 'pattern': 'continuous', 'frequency': 3000, 'duration': 800, 'threat_type': 'eyes_closed'},
+}
+
+
+# Widest frame the pipeline works at - everything downstream
+# (detection input, box overlay, response JPEG) shares this resolution
+MAX_FRAME_WIDTH = 960
+
+
+def _jpeg_is_hd(frame_bytes) -> bool:
+    """Read the frame width from the JPEG SOF marker (no decode needed)"""
+    i, n = 2, len(frame_bytes)
+    while i + 9 < n:
+        if frame_bytes[i] != 0xFF:
+            return False
+        marker = frame_bytes[i + 1]
+        # SOF0-SOF15, excluding DHT/JPG/DAC which share the 0xC0 range
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            width = (frame_bytes[i + 7] << 8) | frame_bytes[i + 8]
+            return width >= 1280
+        i += 2 + ((frame_bytes[i + 2] << 8) | frame_bytes[i + 3])
+    return False
+
+
+# Raw-BGR binary frames: big-endian uint16 height, width, then h*w*3
+# uint8 BGR bytes. Trusted internal clients skip JPEG entirely - the
+# "decode" is a frombuffer + reshape, no pixel work at all.
+_RAW_HEADER = struct.Struct('>HH')
+
+
+def _decode_frame(payload):
+    """Decode one frame payload (JPEG bytes, raw BGR bytes or base64 text) to BGR"""
+    if isinstance(payload, (bytes, bytearray)):
+        if payload[:2] != b'\xff\xd8' and len(payload) > _RAW_HEADER.size:
+            h, w = _RAW_HEADER.unpack_from(payload)
+            if len(payload) == _RAW_HEADER.size + h * w * 3:
+                return np.frombuffer(
+                    payload, dtype=np.uint8, offset=_RAW_HEADER.size
+                ).reshape(h, w, 3)
+        frame_bytes = payload
+    else:
+        frame_data = payload.split(',')[1] if ',' in payload else payload
+        frame_bytes = _b64.b64decode(frame_data, validate=False)
+    nparr = np.frombuffer(frame_bytes, np.uint8)
+    # HD cameras send far more pixels than YOLO's 640x640 input uses.
+    # Half-resolution decode rides libjpeg's DCT-domain downscale -
+    # roughly 2x faster and 4x fewer pixels through everything after.
+    # Frames already <=1280 wide keep the full-resolution decode.
+    flags = cv2.IMREAD_REDUCED_COLOR_2 if _jpeg_is_hd(frame_bytes) else cv2.IMREAD_COLOR
+    frame = cv2.imdecode(nparr, flags)
+    # One resolution through the whole pipeline: detection, annotation
+    # and the JPEG sent back all use this frame, so capping it here cuts
+    # the re-encode cost too. 960px wide is indistinguishable at webcam
+    # viewing distance; the client stretches in CSS.
+    if frame is not None and frame.shape[1] > MAX_FRAME_WIDTH:
+        scale = MAX_FRAME_WIDTH / frame.shape[1]
+        frame = cv2.resize(
+            frame,
+            (MAX_FRAME_WIDTH, int(frame.shape[0] * scale)),
+            interpolation=cv2.INTER_AREA
+        )
+    return frame
+
+
+def _init_detection_worker():
+    """Load the model once per worker process"""
+    from app.models.enhanced_detector import get_enhanced_detector
+    get_enhanced_detector()
+
+
+def _detect_frame_worker(frame, confidence):
+    """Run detection inside a worker process (model cached per process)"""
+    from app.models.enhanced_detector import get_enhanced_detector
+    return get_enhanced_detector().detect_frame(frame, confidence)
+
+
+def _detect_batch_worker(frames, confidence):
+    """Run detection on a batch of frames inside a worker process"""
+    from app.models.enhanced_detector import get_enhanced_detector
+    detector = get_enhanced_detector()
+    if hasattr(detector, 'detect_batch'):
+        return detector.detect_batch(frames, confidence)
+    return [detector.detect_frame(frame, confidence) for frame in frames]
+
+
+# Process pool for YOLO inference - pre/post-processing holds the GIL, so
+# threads contend when several cameras stream at once. Separate processes
+# keep per-camera detection latency independent.
+detection_executor = ProcessPoolExecutor(
+    max_workers=max(1, (os.cpu_count() or 4) // 2),
+    initializer=_init_detection_worker
+)
+
+# Cross-user inference batching: frames from concurrent WebSocket users
+# that arrive within a short window are stacked into one forward pass,
+# amortizing launch/preprocess overhead across users.
+MAX_BATCH = 8
+BATCH_WINDOW = 0.01  # seconds to wait for more frames before dispatch
+
+_batch_queue: asyncio.Queue = asyncio.Queue()
+
+# Bound on concurrent inference calls in flight. One per GPU keeps
+# frames waiting here in the event loop instead of piling up inside the
+# CUDA stream (head-of-line blocking); raise via env on multi-GPU boxes.
+INFERENCE_SEMAPHORE = asyncio.Semaphore(int(os.getenv("INFERENCE_CONCURRENCY", "1")))
+
+# Shared message object for binary frames - the fast path allocates nothing
+_FRAME_MESSAGE = {'type': 'frame'}
+
+# Minimum seconds between repeat alerts for the same threat type on one
+# connection - a persistent threat emails once per window, not per frame
+ALERT_COOLDOWN = 30.0
+
 
-# User preferences storage (in production, use database)
-user_preferences = {}
+async def submit_for_batch(frame, confidence: float = 0.4):
+    """Queue a frame for batched detection and await its result"""
+    future = asyncio.get_event_loop().create_future()
+    await _batch_queue.put((frame, confidence, future))
+    return await future
 
-# Frame processing tracker (prevents frame buildup)
-processing_frames = {}
 
+async def batch_inference_worker():
+    """Drain pending frames into batches and dispatch one detection call"""
+    loop = asyncio.get_event_loop()
+
+    while True:
+        batch = [await _batch_queue.get()]
+
+        # Collect more frames for up to BATCH_WINDOW, capped at MAX_BATCH
+        deadline = loop.time() + BATCH_WINDOW
+        while len(batch) < MAX_BATCH:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_batch_queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+        # Dispatch in a task so the next batch can be collected while
+        # this one runs; the semaphore bounds how many are in flight.
+        asyncio.create_task(_dispatch_batch(loop, batch))
+
+
+async def _dispatch_batch(loop, batch):
+    """Run one collected batch through the detector and resolve its futures"""
+    frames = [item[0] for item in batch]
+    confidence = batch[0][1]
+
+    async with INFERENCE_SEMAPHORE:
+        try:
+            results = await loop.run_in_executor(
+                detection_executor,
+                _detect_batch_worker,
+                frames,
+                confidence
+            )
+            for (_, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+# User preferences storage (in production, use database).
+# TTL-bounded so repeated connect/disconnect cycles can't grow it forever.
+user_preferences = TTLCache(maxsize=10_000, ttl=3600)
+
+# Pre-serialized preference responses - repeat GETs skip re-serialization
+_prefs_json_cache = TTLCache(maxsize=10_000, ttl=3600)
 
 # API Models
 class UserPreferences(BaseModel):
@@ -122,20 +347,26 @@ async def health_check():
 @app.post("/api/preferences/{user_id}")
 async def set_preferences(user_id: str, prefs: UserPreferences):
     """Set user alert preferences"""
-    user_preferences[user_id] = prefs.dict()
+    data = prefs.model_dump()
+    user_preferences[user_id] = data
+    _prefs_json_cache[user_id] = orjson.dumps(data)
     return {"status": "success", "message": "Preferences updated"}
 
 
+DEFAULT_PREFERENCES_JSON = orjson.dumps({
+    "email": "",
+    "enable_email": True,
+    "enable_sms": False,
+    "enable_call": False,
+    "auto_call_emergency": False
+})
+
+
 @app.get("/api/preferences/{user_id}")
 async def get_preferences(user_id: str):
     """Get user alert preferences"""
-    return user_preferences.get(user_id, {
-        "email": "",
-        "enable_email": True,
-        "enable_sms": False,
-        "enable_call": False,
-        "auto_call_emergency": False
-    })
+    cached = _prefs_json_cache.get(user_id, DEFAULT_PREFERENCES_JSON)
+    return Response(content=cached, media_type="application/json")
 
 
 @app.post("/api/chat")
@@ -170,7 +401,8 @@ async def detection_websocket(websocket: WebSocket, user_id: str):
 
     Flow:
     1. Client connects
-    2. Client sends base64 encoded frames
+    2. Client sends frames - raw JPEG bytes (binary message) or
+       base64-in-JSON (legacy text message)
     3. Server processes with YOLOv8 + Activity Recognition
     4. Server sends back:
        - All objects detected
@@ -180,176 +412,272 @@ async def detection_websocket(websocket: WebSocket, user_id: str):
     5. Server triggers alerts if needed
     """
     await manager.connect(user_id, websocket)
-    print(f"✅ WebSocket connected for user: {user_id}")
+    logger.debug("WebSocket connected for user: %s", user_id)
 
     # Get services
     detector = get_enhanced_detector()
     alert_system = get_alert_system()
     ai_analyst = get_ai_analyst()
-    print(f"✅ Services loaded for user: {user_id}")
+    logger.debug("Services loaded for user: %s", user_id)
 
     # Get user preferences
     prefs = user_preferences.get(user_id, {})
 
-    # Initialize frame tracking for this user
-    processing_frames[user_id] = {'processing': False, 'last_time': 0}
-
-    print(f"🚀 Starting detection for user: {user_id}")
-
-    try:
+    # If no alert channel is enabled, skip the whole alert branch per
+    # frame - nothing downstream would send anyway
+    alerts_enabled = (
+        prefs.get('enable_email', True)
+        or prefs.get('enable_sms', False)
+        or prefs.get('enable_call', False)
+    )
+
+    # Latest-frame queue: maxsize=1, the newest frame always wins.
+    # Inference speed naturally backpressures the producer, so there is
+    # no manual FPS throttle and no "processing" flag to race on.
+    # Connection-local, like all per-user state here - it goes out of
+    # scope at return, so there is no global registry to clean up (and
+    # no leak when the two except blocks race on deleting an entry).
+    frame_queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+
+    logger.debug("Starting detection for user: %s", user_id)
+
+    # Binary-mode clients send raw JPEG bytes and get raw JPEG back -
+    # skips two base64 passes and ~25% of bytes on the wire per frame
+    binary_mode = False
+
+    # Bound once per connection - closure loads are LOAD_FAST, so the
+    # per-frame path never repeats the global/getter lookups
+    loop = asyncio.get_event_loop()
+
+    async def process_frame(frame):
+        """Detect, annotate and respond for one decoded frame"""
+        # DETECT THREATS (batched across users, runs in a worker
+        # process so the event loop stays free)
+        results = await submit_for_batch(
+            frame,
+            0.4  # Lower confidence for better detection
+        )
+
+        # Add to AI analyst's knowledge
+        ai_analyst.add_detection(results)
+
+        # Nothing detected? Skip the JPEG re-encode entirely - the client
+        # already renders its own camera feed and keeps the last bitmap.
+        # At 10 FPS and ~50KB/frame that is ~500KB/s saved per idle camera.
+        if not (results['all_objects'] or results['dangerous_items'] or results['unhappy_activities']):
+            jpeg_buffer = None
+        else:
+            # Encode annotated frame (also CPU intensive, run in thread
+            # pool). Quality 70 is plenty for bounding-box overlays and
+            # cuts bytes roughly linearly below the default 95.
+            def encode_frame(frame_with_boxes):
+                _, buffer = cv2.imencode('.jpg', frame_with_boxes, _JPEG_ENCODE_PARAMS)
+                return buffer
+
+            jpeg_buffer = await loop.run_in_executor(
+                executor,
+                encode_frame,
+                results['frame_with_boxes']
+            )
+
+        # Determine audio alert configuration (precomputed payloads)
+        audio_alert = None
+        if results['dangerous_items']:
+            # Critical threats: weapons, fire, etc. - only threat_type varies
+            critical_item = results['dangerous_items'][0]
+            audio_alert = {**_CRITICAL_ITEM_AUDIO_ALERT, 'threat_type': critical_item['type']}
+        elif results['unhappy_activities']:
+            # Activity-based alerts: one regex pass collecting every
+            # matching group, then the most severe one wins
+            activity = results['unhappy_activities'][0]
+            groups = {m.lastgroup for m in _ACTIVITY_RE.finditer(activity['type'])}
+            if groups:
+                audio_alert = _ACTIVITY_AUDIO_ALERTS[
+                    min(groups, key=_ACTIVITY_PRIORITY.__getitem__)]
+
+        # Prepare response
+        response = {
+            'type': 'detection_result',
+            'timestamp': results['timestamp'],
+            'all_objects': results['all_objects'],
+            'dangerous_items': results['dangerous_items'],
+            'unhappy_activities': results['unhappy_activities'],
+            'audio_alert': audio_alert
+        }
+
+        # Send to client. Binary clients get the annotated JPEG as a
+        # separate binary message (no base64 round-trip); legacy
+        # clients keep the data-URL field. annotated_frame is null when
+        # there was nothing to annotate.
+        if binary_mode:
+            response['annotated_frame'] = None
+            await manager.send_message(user_id, response)
+            if jpeg_buffer is not None:
+                await websocket.send_bytes(jpeg_buffer)
+        else:
+            if jpeg_buffer is None:
+                response['annotated_frame'] = None
+            else:
+                # memoryview skips the tobytes() copy into the encoder
+                annotated_frame_b64 = _b64.b64encode(
+                    memoryview(jpeg_buffer)
+                ).decode('ascii')
+                response['annotated_frame'] = f"data:image/jpeg;base64,{annotated_frame_b64}"
+            await manager.send_message(user_id, response)
+
+        # QUEUE FOR ALERTS (single dispatcher task handles delivery).
+        # Non-blocking: if the dispatcher is behind, drop this frame's
+        # alerts - the threat will still be present on the next frame.
+        if alerts_enabled and (results['dangerous_items'] or results['unhappy_activities']):
+            try:
+                alert_queue.put_nowait(results)
+            except asyncio.QueueFull:
+                pass
+
+    # Alert delivery runs in ONE background task per connection, fed by
+    # a queue, instead of a fire-and-forget task per frame. A per-threat
+    # cooldown dedupes: a knife visible at 10 FPS sends one email per
+    # ALERT_COOLDOWN window, not ten per second.
+    alert_queue: asyncio.Queue = asyncio.Queue(maxsize=8)
+    last_alerted: Dict[tuple, float] = {}
+
+    async def alert_dispatcher():
+        """Deliver queued alerts, rate-limited per threat type"""
         while True:
-            # Receive frame from client
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            results = await alert_queue.get()
+            alerts_sent = []
+
+            # Every alert from this frame shares one timestamp (the
+            # frame's own) - cheaper than a datetime.now() per item, and
+            # downstream dedup can group by it
+            frame_ts = results['timestamp']
+            location = f"Camera - User {user_id}"
+
+            def make_threat_data(threat_type, severity, description):
+                return {
+                    'type': threat_type,
+                    'severity': severity,
+                    'description': description,
+                    'timestamp': frame_ts,
+                    'location': location
+                }
+
+            now = time.monotonic()
+
+            def should_alert(kind, threat_type):
+                key = (kind, threat_type)
+                if now - last_alerted.get(key, 0.0) < ALERT_COOLDOWN:
+                    return False
+                last_alerted[key] = now
+                return True
+
+            # Alert for dangerous items
+            for item in results['dangerous_items']:
+                if item['severity'] in ['critical', 'high'] and should_alert('dangerous_item', item['type']):
+                    threat_data = make_threat_data(
+                        'dangerous_item',
+                        item['severity'],
+                        f"{item['type']} detected (confidence: {item['confidence']:.0%})"
+                    )
 
-            if message.get('type') == 'frame':
-                # FRAME RATE LIMITING: Skip if already processing or too soon
-                current_time = time.time()
-                if processing_frames[user_id]['processing']:
-                    continue  # Skip this frame, still processing previous
+                    # Send alerts
+                    try:
+                        alert_result = await alert_system.send_threat_alert(threat_data, prefs)
+                        alerts_sent.append({
+                            'threat': item['type'],
+                            'alerts': alert_result
+                        })
+                    except Exception:
+                        logger.warning("Alert error for %s", user_id, exc_info=True)
+
+            # Alert for unhappy activities
+            for activity in results['unhappy_activities']:
+                if activity['severity'] in ['critical', 'high'] and should_alert('unhappy_activity', activity['type']):
+                    threat_data = make_threat_data(
+                        'unhappy_activity',
+                        activity['severity'],
+                        activity['description']
+                    )
 
-                if current_time - processing_frames[user_id]['last_time'] < 0.1:  # Max 10 FPS
-                    continue
+                    # Send alerts
+                    try:
+                        alert_result = await alert_system.send_threat_alert(threat_data, prefs)
+                        alerts_sent.append({
+                            'threat': activity['type'],
+                            'alerts': alert_result
+                        })
+                    except Exception:
+                        logger.warning("Alert error for %s", user_id, exc_info=True)
+
+            # Send alert confirmation to client
+            if alerts_sent:
+                await manager.send_message(user_id, {
+                    'type': 'alerts_sent',
+                    'alerts': alerts_sent
+                })
 
-                processing_frames[user_id]['last_time'] = current_time
-                processing_frames[user_id]['processing'] = True
+    # Pipeline: receive -> frame_queue -> decode -> decoded_queue ->
+    # inference/respond. With one frame in flight per stage, decoding
+    # frame N+1 overlaps inference of frame N; both queues are
+    # drop-latest so backpressure sheds stale frames, not fresh ones.
+    decoded_queue: asyncio.Queue = asyncio.Queue(maxsize=1)
 
-                try:
-                    # Decode base64 frame
-                    frame_data = message['frame'].split(',')[1] if ',' in message['frame'] else message['frame']
-                    frame_bytes = base64.b64decode(frame_data)
-                    nparr = np.frombuffer(frame_bytes, np.uint8)
-                    frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-                    if frame is None:
-                        processing_frames[user_id]['processing'] = False
-                        continue
-
-                    # DETECT THREATS (run in thread pool to avoid blocking)
-                    loop = asyncio.get_event_loop()
-                    results = await loop.run_in_executor(
-                        executor,
-                        detector.detect_frame,
-                        frame,
-                        0.4  # Lower confidence for better detection
-                    )
+    async def decode_frames():
+        """Stage 1: decode payloads in the thread pool"""
+        while True:
+            payload = await frame_queue.get()
+            try:
+                frame = await loop.run_in_executor(executor, _decode_frame, payload)
+            except Exception:
+                logger.debug("Frame decode error for %s", user_id, exc_info=True)
+                continue
+            if frame is None:
+                continue
+            try:
+                decoded_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            decoded_queue.put_nowait(frame)
 
-                    # Add to AI analyst's knowledge
-                    ai_analyst.add_detection(results)
+    async def consume_frames():
+        """Stage 2: run detection and respond"""
+        while True:
+            frame = await decoded_queue.get()
+            try:
+                await process_frame(frame)
+            except Exception:
+                logger.warning("Frame processing error for %s", user_id, exc_info=True)
 
-                    # Encode annotated frame (also CPU intensive, run in thread pool)
-                    def encode_frame(frame_with_boxes):
-                        _, buffer = cv2.imencode('.jpg', frame_with_boxes)
-                        return base64.b64encode(buffer).decode('utf-8')
+    decoder_task = asyncio.create_task(decode_frames())
+    consumer_task = asyncio.create_task(consume_frames())
+    alert_task = asyncio.create_task(alert_dispatcher())
 
-                    annotated_frame_b64 = await loop.run_in_executor(
-                        executor,
-                        encode_frame,
-                        results['frame_with_boxes']
-                    )
+    try:
+        while True:
+            # Receive frame from client (binary = raw JPEG, text = JSON)
+            data = await websocket.receive()
+            if data.get('type') == 'websocket.disconnect':
+                raise WebSocketDisconnect(data.get('code') or 1000)
+
+            raw_frame = data.get('bytes')
+            if raw_frame is not None:
+                # Binary frame: no JSON on the fast path at all
+                binary_mode = True
+                message = _FRAME_MESSAGE
+            else:
+                # Legacy text frames carry ~80KB of base64 in JSON -
+                # orjson parses them several times faster than stdlib
+                message = orjson.loads(data['text'])
 
-                    # Determine audio alert configuration
-                    audio_alert = None
-                    if results['dangerous_items']:
-                        # Critical threats: weapons, fire, etc.
-                        critical_item = results['dangerous_items'][0]
-                        audio_alert = {
-                            'enabled': True,
-                            'severity': 'critical',
-                            'pattern': 'triple',
-                            'frequency': 2500,
-                            'duration': 200,
-                            'threat_type': critical_item['type']
-                        }
-                    elif results['unhappy_activities']:
-                        # Activity-based alerts
-                        activity = results['unhappy_activities'][0]
-                        activity_type = activity['type'].lower()
-
-                        if 'unconscious' in activity_type:
-                            audio_alert = {'enabled': True, 'severity': 'critical', 'pattern': 'triple', 'frequency': 2500, 'duration': 200, 'threat_type': 'unconscious'}
-                        elif 'drowning' in activity_type:
-                            audio_alert = {'enabled': True, 'severity': 'critical', 'pattern': 'triple', 'frequency': 2500, 'duration': 200, 'threat_type': 'drowning'}
-                        elif 'falling' in activity_type:
-                            audio_alert = {'enabled': True, 'severity': 'high', 'pattern': 'single', 'frequency': 2000, 'duration': 800, 'threat_type': 'falling'}
-                        elif 'sleeping' in activity_type:
-                            audio_alert = {'enabled': True, 'severity': 'medium', 'pattern': 'single', 'frequency': 1500, 'duration': 500, 'threat_type': 'sleeping'}
-                        elif 'eyes' in activity_type or 'closed' in activity_type:
-                            audio_alert = {'enabled': True, 'severity': 'high', 'pattern': 'continuous', 'frequency': 3000, 'duration': 800, 'threat_type': 'eyes_closed'}
-
-                    # Prepare response
-                    response = {
-                        'type': 'detection_result',
-                        'timestamp': results['timestamp'],
-                        'all_objects': results['all_objects'],
-                        'dangerous_items': results['dangerous_items'],
-                        'unhappy_activities': results['unhappy_activities'],
-                        'annotated_frame': f"data:image/jpeg;base64,{annotated_frame_b64}",
-                        'audio_alert': audio_alert
-                    }
-
-                    # Send to client
-                    await manager.send_message(user_id, response)
-
-                    # CHECK FOR ALERTS (run in background, don't block)
-                    async def send_alerts_background():
-                        alerts_sent = []
-
-                        # Alert for dangerous items
-                        for item in results['dangerous_items']:
-                            if item['severity'] in ['critical', 'high']:
-                                threat_data = {
-                                    'type': 'dangerous_item',
-                                    'severity': item['severity'],
-                                    'description': f"{item['type']} detected (confidence: {item['confidence']:.0%})",
-                                    'timestamp': datetime.now().isoformat(),
-                                    'location': f"Camera - User {user_id}"
-                                }
-
-                                # Send alerts
-                                try:
-                                    alert_result = await alert_system.send_threat_alert(threat_data, prefs)
-                                    alerts_sent.append({
-                                        'threat': item['type'],
-                                        'alerts': alert_result
-                                    })
-                                except Exception as e:
-                                    print(f"Alert error: {e}")
-
-                        # Alert for unhappy activities
-                        for activity in results['unhappy_activities']:
-                            if activity['severity'] in ['critical', 'high']:
-                                threat_data = {
-                                    'type': 'unhappy_activity',
-                                    'severity': activity['severity'],
-                                    'description': activity['description'],
-                                    'timestamp': datetime.now().isoformat(),
-                                    'location': f"Camera - User {user_id}"
-                                }
-
-                                # Send alerts
-                                try:
-                                    alert_result = await alert_system.send_threat_alert(threat_data, prefs)
-                                    alerts_sent.append({
-                                        'threat': activity['type'],
-                                        'alerts': alert_result
-                                    })
-                                except Exception as e:
-                                    print(f"Alert error: {e}")
-
-                        # Send alert confirmation to client
-                        if alerts_sent:
-                            await manager.send_message(user_id, {
-                                'type': 'alerts_sent',
-                                'alerts': alerts_sent
-                            })
-
-                    # Fire and forget - don't wait for alerts
-                    asyncio.create_task(send_alerts_background())
-
-                finally:
-                    # Always reset processing flag
-                    processing_frames[user_id]['processing'] = False
+            if message.get('type') == 'frame':
+                # Drop-latest: atomically replace any stale queued frame
+                # so the consumer always sees the newest one
+                payload = raw_frame if raw_frame is not None else message['frame']
+                try:
+                    frame_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+                frame_queue.put_nowait(payload)
 
             elif message.get('type') == 'chat':
                 # Handle chat message
@@ -363,17 +691,17 @@ async def detection_websocket(websocket: WebSocket, user_id: str):
 
     except WebSocketDisconnect:
         manager.disconnect(user_id)
-        if user_id in processing_frames:
-            del processing_frames[user_id]
-        print(f"❌ User {user_id} disconnected")
-
-    except Exception as e:
-        print(f"❌ ERROR in WebSocket for {user_id}: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        decoder_task.cancel()
+        consumer_task.cancel()
+        alert_task.cancel()
+        logger.debug("User %s disconnected", user_id)
+
+    except Exception:
+        logger.exception("ERROR in WebSocket for %s", user_id)
         manager.disconnect(user_id)
-        if user_id in processing_frames:
-            del processing_frames[user_id]
+        decoder_task.cancel()
+        consumer_task.cancel()
+        alert_task.cancel()
 
 
 # =============================================================================
@@ -397,6 +725,9 @@ async def startup_event():
     # Initialize AI analyst
     ai_analyst = get_ai_analyst()
 
+    # Start the cross-user inference batching worker
+    asyncio.create_task(batch_inference_worker())
+
     print("\n" + "="*60)
     print("✅ All services ready!")
     print("="*60)
@@ -406,6 +737,15 @@ async def startup_event():
     print("\n" + "="*60 + "\n")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Clean up pooled connections on shutdown"""
+    from app.alerts.email_sender import get_email_sender
+    from app.db.database import get_db_client
+    await get_email_sender().close()
+    await get_db_client().close()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -8,22 +8,104 @@ import cv2
 import numpy as np
 from typing import List, Dict
 import os
+import re
+import time
 
 
 class YOLODetector:
     """YOLOv8 nano detector for real-time object detection"""
 
-    def __init__(self, model_path: str = "yolov8n.pt"):
+    # Max Hamming distance between consecutive frame dHashes for the
+    # scene to count as static (out of 64 bits)
+    DHASH_THRESHOLD = 3
+
+    def __init__(self, model_path: str = "yolov8n.pt",
+                 calibration_data: str = "coco128.yaml",
+                 precision: str = None):
         """
         Initialize YOLOv8 detector
 
         Args:
             model_path: Path to YOLOv8 weights (will auto-download if not found)
+            calibration_data: Dataset yaml for INT8 quantization calibration
+                (only used with USE_OPENVINO=1 at int8 precision)
+            precision: 'int8' or 'fp16' for the OpenVINO export (defaults
+                to the YOLO_PRECISION env var, then 'int8'). FP16 skips
+                calibration and avoids the rare stacks where INT8 is
+                slower, at roughly half the INT8 speedup.
         """
+        self.precision = (precision or os.getenv("YOLO_PRECISION", "int8")).lower()
         print(f"Loading YOLOv8 model from {model_path}...")
 
-        # YOLOv8 will auto-download if model not found
-        self.model = YOLO(model_path)
+        # Optionally run on a TensorRT FP16 engine (USE_TRT=1): roughly
+        # halves inference latency vs FP32 PyTorch on GPU deployments.
+        # Export happens once; the engine is reused on later startups.
+        if os.getenv("USE_TRT") == "1":
+            engine_path = os.path.splitext(model_path)[0] + ".engine"
+            try:
+                if not os.path.exists(engine_path):
+                    print("Exporting YOLOv8 to TensorRT FP16 engine (one-time)...")
+                    YOLO(model_path).export(format="engine", half=True, imgsz=640, device=0)
+                self.model = YOLO(engine_path)
+                self.device = 0
+                print(f"✅ TensorRT engine loaded from {engine_path}")
+            except Exception as e:
+                print(f"⚠️  TensorRT unavailable ({e}), falling back to PyTorch")
+                self.model = YOLO(model_path)
+                self.device = 'cpu'
+        # CPU deployments: INT8 OpenVINO (USE_OPENVINO=1) uses VNNI/AVX-512
+        # integer ops and halves weight bandwidth - roughly 2x over FP32
+        # PyTorch at near-identical mAP. Calibration runs once at export.
+        elif os.getenv("USE_OPENVINO") == "1":
+            int8 = self.precision != "fp16"
+            suffix = "_int8_openvino_model" if int8 else "_openvino_model"
+            ov_dir = os.path.splitext(model_path)[0] + suffix
+            try:
+                if not os.path.isdir(ov_dir):
+                    print(f"Exporting YOLOv8 to {self.precision.upper()} OpenVINO IR (one-time)...")
+                    if int8:
+                        YOLO(model_path).export(
+                            format="openvino", int8=True,
+                            data=calibration_data, imgsz=640
+                        )
+                    else:
+                        YOLO(model_path).export(
+                            format="openvino", half=True, imgsz=640
+                        )
+                self.model = YOLO(ov_dir, task='detect')
+                # OpenVINO picks its own device - don't force one
+                self.device = None
+                print(f"✅ OpenVINO {self.precision.upper()} model loaded from {ov_dir}")
+            except Exception as e:
+                print(f"⚠️  OpenVINO unavailable ({e}), falling back to PyTorch")
+                self.model = YOLO(model_path)
+                self.device = 'cpu'
+        else:
+            # YOLOv8 will auto-download if model not found
+            self.model = YOLO(model_path)
+            self.device = 'cpu'
+
+        # Static-scene gate: an 8x8 dHash of each frame costs a few
+        # microseconds; when it matches the previous frame's hash the
+        # whole inference is skipped and the last detections reused.
+        # Surveillance feeds are static most of the time.
+        self._last_hash = 0
+        self._last_dets = None
+
+        # Preallocated letterbox canvas: every frame is resized into
+        # the same 640x640 buffer (114-gray padding, YOLO's convention)
+        # instead of allocating a fresh array per call. The resize
+        # scratch buffer is sized on first use and reused while the
+        # stream's resolution stays stable.
+        self._input_buf = np.full((640, 640, 3), 114, dtype=np.uint8)
+        self._resize_buf = None
+
+        # Class-id -> name mapping is identical every frame (COCO);
+        # resolve it once instead of through result.names per frame
+        try:
+            self._names = self.model.names
+        except Exception:
+            self._names = None
 
         # Dangerous objects to highlight
         self.dangerous_classes = {
@@ -31,6 +113,10 @@ class YOLODetector:
             'baseball bat', 'fire', 'flame'
         }
 
+        # Compiled once: one DFA pass per class name instead of a
+        # substring scan per dangerous class on every is_dangerous call
+        self._danger_re = re.compile('|'.join(map(re.escape, self.dangerous_classes)))
+
         print("YOLOv8 model loaded successfully!")
 
     def detect(self, frame: np.ndarray, confidence: float = 0.4) -> List[Dict]:
@@ -50,48 +136,131 @@ class YOLODetector:
                 'timestamp': time.time()
             }
         """
-        import time
+        # Static-scene gate: near-identical frame, reuse last result
+        frame_hash = self._dhash(frame)
+        if self._last_dets is not None and \
+                bin(frame_hash ^ self._last_hash).count('1') < self.DHASH_THRESHOLD:
+            ts = time.time()
+            return [{**detection, 'timestamp': ts} for detection in self._last_dets]
+
+        # Letterbox into the reusable canvas ourselves so predict sees
+        # an already-640x640 input and allocates nothing for preprocessing
+        canvas, scale, left, top = self._letterbox(frame)
 
         # Run inference
         results = self.model.predict(
-            frame,
+            canvas,
             conf=confidence,
-            verbose=False,  # Suppress output
-            device='cpu'    # Use CPU for MVP (GPU optional)
+            verbose=False,      # Suppress output
+            device=self.device  # GPU when the TRT engine is active, else CPU
         )
 
-        detections = []
+        if len(results) == 0:
+            return []
 
-        # Process results
-        if len(results) > 0:
-            result = results[0]
+        detections = self._result_to_detections(results[0], time.time())
 
-            # Extract boxes
-            if result.boxes is not None and len(result.boxes) > 0:
-                for box in result.boxes:
-                    # Get class ID and name
-                    class_id = int(box.cls[0])
-                    class_name = result.names[class_id]
+        # Map boxes from canvas coordinates back onto the original frame
+        inv = 1.0 / scale
+        for detection in detections:
+            x1, y1, x2, y2 = detection['bbox']
+            detection['bbox'] = [
+                (x1 - left) * inv, (y1 - top) * inv,
+                (x2 - left) * inv, (y2 - top) * inv
+            ]
 
-                    # Get confidence
-                    conf = float(box.conf[0])
+        self._last_hash = frame_hash
+        self._last_dets = detections
 
-                    # Get bounding box (xyxy format)
-                    bbox = box.xyxy[0].cpu().numpy().tolist()
+        return detections
 
-                    detections.append({
-                        'type': class_name,
-                        'confidence': conf,
-                        'bbox': bbox,
-                        'timestamp': time.time()
-                    })
+    @staticmethod
+    def _dhash(frame: np.ndarray) -> int:
+        """8x8 difference hash - stable across near-identical frames"""
+        small = cv2.resize(
+            cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (9, 8),
+            interpolation=cv2.INTER_AREA
+        )
+        diff = small[:, 1:] > small[:, :-1]
+        return int.from_bytes(np.packbits(diff).tobytes(), 'big')
 
-        return detections
+    def _letterbox(self, frame: np.ndarray):
+        """Resize frame into the preallocated 640x640 canvas, keeping aspect
+
+        Returns (canvas, scale, left_pad, top_pad) so boxes can be
+        mapped back to the source frame.
+        """
+        h, w = frame.shape[:2]
+        scale = min(640 / h, 640 / w)
+        nh, nw = int(round(h * scale)), int(round(w * scale))
+
+        if self._resize_buf is None or self._resize_buf.shape[:2] != (nh, nw):
+            # Resolution changed - new scratch buffer, clear stale padding
+            self._resize_buf = np.empty((nh, nw, 3), dtype=np.uint8)
+            self._input_buf[:] = 114
+
+        cv2.resize(frame, (nw, nh), dst=self._resize_buf, interpolation=cv2.INTER_LINEAR)
+
+        top = (640 - nh) // 2
+        left = (640 - nw) // 2
+        self._input_buf[top:top + nh, left:left + nw] = self._resize_buf
+        return self._input_buf, scale, left, top
+
+    def detect_batch(self, frames: List[np.ndarray], confidence: float = 0.4) -> List[List[Dict]]:
+        """
+        Run detection on a batch of frames in one model call
+
+        One predict() over N frames amortizes kernel launch and pre/post
+        processing overhead that a call per frame would pay N times -
+        this is what the server's cross-user micro-batcher feeds.
+
+        Args:
+            frames: List of BGR frames
+            confidence: Minimum confidence threshold
+
+        Returns:
+            One detection list per input frame, in input order
+        """
+        if not frames:
+            return []
+
+        results = self.model.predict(
+            frames,
+            conf=confidence,
+            verbose=False,
+            device=self.device
+        )
+
+        ts = time.time()
+        return [self._result_to_detections(result, ts) for result in results]
+
+    def _result_to_detections(self, result, ts: float) -> List[Dict]:
+        """Convert one Ultralytics result into the detection dict list"""
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return []
+
+        # Pull the whole tensors across at once - one device sync for
+        # the frame instead of a .cpu() round-trip per box, and no
+        # per-box Python attribute traffic
+        cls = boxes.cls.cpu().numpy().astype(np.int32)
+        conf = boxes.conf.cpu().numpy()
+        xyxy = boxes.xyxy.cpu().numpy()
+
+        names = self._names if self._names is not None else result.names
+        return [
+            {
+                'type': names[c],
+                'confidence': float(cf),
+                'bbox': xy.tolist(),
+                'timestamp': ts
+            }
+            for c, cf, xy in zip(cls, conf, xyxy)
+        ]
 
     def is_dangerous(self, detection: Dict) -> bool:
         """Check if detection is a dangerous object"""
-        obj_type = detection['type'].lower()
-        return any(dangerous in obj_type for dangerous in self.dangerous_classes)
+        return bool(self._danger_re.search(detection['type'].lower()))
 
 
 # Global detector instance (loaded once)
@@ -106,3 +275,15 @@ def get_detector() -> YOLODetector:
         _detector = YOLODetector()
 
     return _detector
+
+
+# PRELOAD_DETECTOR=1 loads the model at import time so fork-based
+# servers (uvicorn --workers N on Linux) inherit the weight pages
+# copy-on-write instead of each worker loading its own ~6MB + PyTorch
+# allocator overhead. Left off by default: spawn-based servers gain
+# nothing and single-worker cold start would pay the load up front.
+if os.getenv("PRELOAD_DETECTOR") == "1":
+    import multiprocessing
+
+    if multiprocessing.get_start_method(allow_none=True) in (None, "fork"):
+        get_detector()